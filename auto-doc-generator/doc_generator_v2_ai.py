@@ -8,10 +8,24 @@ This version uses OpenRouter API for intelligent documentation generation.
 
 import os
 import re
+import ast
 import json
 import requests
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import h2  # noqa: F401 -- lets httpx negotiate HTTP/2
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
 
 
 # ============================================================================
@@ -23,6 +37,10 @@ OPENROUTER_API_KEY = os.environ.get("OPENROUTER_API_KEY", "API_KEY")
 OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
 DEFAULT_MODEL = "openrouter/auto"
 
+# Large repositories are documented in several API calls issued concurrently
+SUMMARY_TOKEN_BUDGET = 6000  # Rough prompt tokens (len(text) // 4) per call
+MAX_CONCURRENT_REQUESTS = 8
+
 # Language support
 SUPPORTED_EXTENSIONS = {
     '.py': 'Python',
@@ -58,35 +76,163 @@ class CodeScanner:
     
     def scan(self) -> List[Dict]:
         """Scan repository and return file list."""
+        root = str(self.repo_path)
+        # Length of the "<root>/" prefix stripped from entry paths
+        prefix_len = len(os.path.join(root, ''))
         files = []
         
-        for root, dirs, filenames in os.walk(self.repo_path):
-            # Filter out excluded directories
-            dirs[:] = [d for d in dirs if d not in self.exclude_dirs]
+        for entry in self._walk(root):
+            name = entry.name
+            stem, dot, suffix = name.rpartition('.')
+            ext = dot + suffix if stem else ''
+            language = SUPPORTED_EXTENSIONS.get(ext)
             
-            for filename in filenames:
-                if filename.startswith('.'):
-                    continue
-                    
-                file_path = Path(root) / filename
-                ext = file_path.suffix
-                
-                if ext in SUPPORTED_EXTENSIONS:
-                    files.append({
-                        'path': str(file_path),
-                        'name': filename,
-                        'extension': ext,
-                        'language': SUPPORTED_EXTENSIONS.get(ext, 'Unknown'),
-                        'relative_path': str(file_path.relative_to(self.repo_path))
-                    })
+            if language is not None:
+                files.append({
+                    'path': entry.path,
+                    'name': name,
+                    'extension': ext,
+                    'language': language,
+                    'relative_path': entry.path[prefix_len:]
+                })
         
         return files
+    
+    def _walk(self, directory: str) -> Iterator[os.DirEntry]:
+        """Yield non-hidden files under directory, top-down like os.walk."""
+        try:
+            with os.scandir(directory) as it:
+                entries = list(it)
+        except OSError:
+            return
+        
+        subdirs = []
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in self.exclude_dirs:
+                        subdirs.append(entry.path)
+                elif not entry.name.startswith('.') and entry.is_file():
+                    yield entry
+            except OSError:
+                continue
+        
+        for subdir in subdirs:
+            yield from self._walk(subdir)
 
 
 # ============================================================================
 # CODE ANALYZER
 # ============================================================================
 
+# Patterns are compiled once at import time rather than on every analyze() call.
+# Sources are scanned as raw bytes; only the captured names are decoded.
+# Line-start patterns match a literal "\n" (the source is scanned with one
+# prepended) rather than "^", which would rule out the fast literal search.
+_PY_IMPORT_RE = re.compile(rb'\n(?:from\s+(\S+)|import\s+(\S+))')
+_PY_CLASS_RE = re.compile(rb'^class\s+(\w+)(?:\(([^)\n]+)\))?:', re.MULTILINE)
+_PY_FUNC_RE = re.compile(rb'^def\s+(\w+)\s*\(([^)\n]*)\):', re.MULTILINE)
+_PY_DOCSTRING_RE = re.compile(rb'"""(.*?)"""', re.DOTALL)
+
+# Start of every top-level class/def line. The class/def patterns above are tried
+# at each one and only read one-line headers; the rest (async, return
+# annotations, signatures split over lines) go through ast, one header at a time.
+_PY_CLASS_HEAD_RE = re.compile(rb'\nclass\s')
+_PY_FUNC_HEAD_RE = re.compile(rb'\n(?:async\s+)?def\s')
+_PY_HEADER_MAX_LINES = 50
+
+_JS_IMPORT_RE = re.compile(rb"import\s+(?:{[^}]+}|[\w*]+)\s+from\s+['\"]([^'\"]+)['\"]")
+_JS_REQUIRE_RE = re.compile(rb"const\s+(\w+)\s+=\s+require\(['\"]([^'\"]+)['\"]\)")
+_JS_FUNC_RE = re.compile(rb'(?:function\s+(\w+)|const\s+(\w+)\s+=\s*(?:\([^)]*\)|[^=])\s*=>)')
+_JS_CLASS_RE = re.compile(rb'class\s+(\w+)')
+
+_GO_IMPORT_RE = re.compile(rb'import\s+"(.*?)"')
+_GO_FUNC_RE = re.compile(rb'func\s+(?:\(\w+\s+\*?\w+\)\s+)?(\w+)\s*\(')
+_GO_TYPE_RE = re.compile(rb'type\s+(\w+)\s+struct')
+
+_RS_USE_RE = re.compile(rb'use\s+([\w:]+)')
+_RS_STRUCT_RE = re.compile(rb'struct\s+(\w+)')
+_RS_FUNC_RE = re.compile(rb'fn\s+(\w+)')
+_RS_IMPL_RE = re.compile(rb'impl(?:\s+<[^>]+>)?\s+(\w+)')
+
+
+def _decode(raw: bytes) -> str:
+    """Decode a matched byte span, dropping invalid UTF-8."""
+    return raw.decode('utf-8', errors='ignore')
+
+
+def _parse_python_header(content: bytes, start: int) -> Optional[Tuple[bytes, ast.AST]]:
+    """Parse the class/def header at start with ast, growing it a line at a time."""
+    end = start
+    for _ in range(_PY_HEADER_MAX_LINES):
+        end = content.find(b'\n', end + 1)
+        if end == -1:
+            end = len(content)
+        header = content[start:end]
+        # Only try once the signature's parentheses are closed. "def f(...):"
+        # needs a body to parse; one-liners already have one
+        if header.count(b'(') <= header.count(b')'):
+            for source in (header + b'\n pass', header):
+                try:
+                    return header, ast.parse(source).body[0]
+                except (SyntaxError, ValueError):
+                    continue
+        if end == len(content):
+            break
+    return None
+
+
+class _PythonStructureVisitor(ast.NodeVisitor):
+    """Collect a class or function entry from a parsed Python header."""
+    
+    def __init__(self, content: bytes, analysis: Dict):
+        self.content = content
+        self.analysis = analysis
+        self._lines = None
+    
+    def _segment(self, node: ast.AST) -> str:
+        """Source text of node (ast offsets are byte offsets, so slice the raw lines)."""
+        if self._lines is None:
+            self._lines = self.content.splitlines(keepends=True)
+        lines = self._lines[node.lineno - 1:node.end_lineno]
+        if len(lines) == 1:
+            return _decode(lines[0][node.col_offset:node.end_col_offset])
+        lines[0] = lines[0][node.col_offset:]
+        lines[-1] = lines[-1][:node.end_col_offset]
+        return _decode(b''.join(lines))
+    
+    def visit_ClassDef(self, node: ast.ClassDef):
+        # Methods and nested classes are not recursed into
+        self.analysis['classes'].append({
+            'name': node.name,
+            'bases': [self._segment(b) for b in node.bases]
+        })
+    
+    def _param(self, arg: ast.arg, default: Optional[ast.expr]) -> str:
+        if default is None:
+            return arg.arg
+        return f"{arg.arg}={self._segment(default)}"
+    
+    def visit_FunctionDef(self, node):
+        args = node.args
+        positional = args.posonlyargs + args.args
+        defaults = [None] * (len(positional) - len(args.defaults)) + args.defaults
+        params = [self._param(a, d) for a, d in zip(positional, defaults)]
+        if args.vararg:
+            params.append('*' + args.vararg.arg)
+        elif args.kwonlyargs:
+            params.append('*')
+        params.extend(self._param(a, d) for a, d in zip(args.kwonlyargs, args.kw_defaults))
+        if args.kwarg:
+            params.append('**' + args.kwarg.arg)
+        self.analysis['functions'].append({
+            'name': node.name,
+            'params': ', '.join(params)
+        })
+    
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+
 class CodeAnalyzer:
     """Analyze code files to extract structure."""
     
@@ -96,7 +242,9 @@ class CodeAnalyzer:
     def analyze(self, file_path: str) -> Dict:
         """Analyze a single code file."""
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+            # Read raw bytes: the patterns work on bytes directly,
+            # so the whole file never goes through a text decoder
+            with open(file_path, 'rb') as f:
                 content = f.read()
         except Exception as e:
             return {'error': str(e)}
@@ -114,7 +262,7 @@ class CodeAnalyzer:
         else:
             return self._analyze_generic(content)
     
-    def _analyze_python(self, content: str) -> Dict:
+    def _analyze_python(self, content: bytes) -> Dict:
         """Analyze Python code."""
         analysis = {
             'language': 'Python',
@@ -125,33 +273,56 @@ class CodeAnalyzer:
             'top_level_vars': []
         }
         
+        # So the first line also starts with "\n" for the line-start patterns
+        lines = b'\n' + content
+        
         # Extract imports
-        for match in re.finditer(r'^(?:from\s+(\S+)|import\s+(\S+))', content, re.MULTILINE):
+        for match in _PY_IMPORT_RE.finditer(lines):
             imp = match.group(1) or match.group(2)
-            analysis['imports'].append(imp)
+            analysis['imports'].append(_decode(imp))
         
         # Extract classes
-        for match in re.finditer(r'^class\s+(\w+)(?:\(([^)]+)\))?:', content, re.MULTILINE):
-            analysis['classes'].append({
-                'name': match.group(1),
-                'bases': match.group(2).split(', ') if match.group(2) else []
-            })
+        self._scan_python_headers(lines, _PY_CLASS_HEAD_RE, _PY_CLASS_RE, self._class_entry, analysis, 'classes')
         
         # Extract functions
-        for match in re.finditer(r'^def\s+(\w+)\s*\(([^)]*)\):', content, re.MULTILINE):
-            analysis['functions'].append({
-                'name': match.group(1),
-                'params': match.group(2)
-            })
+        self._scan_python_headers(lines, _PY_FUNC_HEAD_RE, _PY_FUNC_RE, self._function_entry, analysis, 'functions')
         
         # Extract module docstring
-        match = re.search(r'"""(.*?)"""', content, re.DOTALL)
+        match = _PY_DOCSTRING_RE.search(content)
         if match:
-            analysis['docstring'] = match.group(1).strip()[:300]
+            analysis['docstring'] = _decode(match.group(1).strip())[:300]
         
         return analysis
     
-    def _analyze_javascript(self, content: str) -> Dict:
+    @staticmethod
+    def _class_entry(match: re.Match) -> Dict:
+        return {
+            'name': _decode(match.group(1)),
+            'bases': _decode(match.group(2)).split(', ') if match.group(2) else []
+        }
+    
+    @staticmethod
+    def _function_entry(match: re.Match) -> Dict:
+        return {
+            'name': _decode(match.group(1)),
+            'params': _decode(match.group(2))
+        }
+    
+    def _scan_python_headers(self, content: bytes, head_re: re.Pattern, line_re: re.Pattern,
+                             make_entry, analysis: Dict, key: str):
+        """Read each header with line_re, parsing with ast only those it can't read."""
+        for head in head_re.finditer(content):
+            start = head.start() + 1  # Past the "\n"
+            match = line_re.match(content, start)
+            if match:
+                analysis[key].append(make_entry(match))
+                continue
+            parsed = _parse_python_header(content, start)
+            if parsed is not None:
+                header, node = parsed
+                _PythonStructureVisitor(header, analysis).visit(node)
+    
+    def _analyze_javascript(self, content: bytes) -> Dict:
         """Analyze JavaScript/TypeScript code."""
         analysis = {
             'language': 'JavaScript/TypeScript',
@@ -163,26 +334,26 @@ class CodeAnalyzer:
         }
         
         # ES6 imports
-        for match in re.finditer(r"import\s+(?:{[^}]+}|[\w*]+)\s+from\s+['\"]([^'\"]+)['\"]", content):
-            analysis['imports'].append(match.group(1))
+        for match in _JS_IMPORT_RE.finditer(content):
+            analysis['imports'].append(_decode(match.group(1)))
         
         # require statements
-        for match in re.finditer(r"const\s+(\w+)\s+=\s+require\(['\"]([^'\"]+)['\"]\)", content):
-            analysis['imports'].append(match.group(2))
+        for match in _JS_REQUIRE_RE.finditer(content):
+            analysis['imports'].append(_decode(match.group(2)))
         
         # Function declarations
-        for match in re.finditer(r'(?:function\s+(\w+)|const\s+(\w+)\s+=\s*(?:\([^)]*\)|[^=])\s*=>)', content):
+        for match in _JS_FUNC_RE.finditer(content):
             func_name = match.group(1) or match.group(2)
             if func_name:
-                analysis['functions'].append(func_name)
+                analysis['functions'].append(_decode(func_name))
         
         # Classes
-        for match in re.finditer(r'class\s+(\w+)', content):
-            analysis['classes'].append(match.group(1))
+        for match in _JS_CLASS_RE.finditer(content):
+            analysis['classes'].append(_decode(match.group(1)))
         
         return analysis
     
-    def _analyze_go(self, content: str) -> Dict:
+    def _analyze_go(self, content: bytes) -> Dict:
         """Analyze Go code."""
         analysis = {
             'language': 'Go',
@@ -192,20 +363,20 @@ class CodeAnalyzer:
         }
         
         # Imports
-        for match in re.finditer(r'import\s+"(.*?)"', content):
-            analysis['imports'].append(match.group(1))
+        for match in _GO_IMPORT_RE.finditer(content):
+            analysis['imports'].append(_decode(match.group(1)))
         
         # Functions
-        for match in re.finditer(r'func\s+(?:\(\w+\s+\*?\w+\)\s+)?(\w+)\s*\(', content):
-            analysis['functions'].append(match.group(1))
+        for match in _GO_FUNC_RE.finditer(content):
+            analysis['functions'].append(_decode(match.group(1)))
         
         # Types
-        for match in re.finditer(r'type\s+(\w+)\s+struct', content):
-            analysis['types'].append(match.group(1))
+        for match in _GO_TYPE_RE.finditer(content):
+            analysis['types'].append(_decode(match.group(1)))
         
         return analysis
     
-    def _analyze_rust(self, content: str) -> Dict:
+    def _analyze_rust(self, content: bytes) -> Dict:
         """Analyze Rust code."""
         analysis = {
             'language': 'Rust',
@@ -216,28 +387,28 @@ class CodeAnalyzer:
         }
         
         # Use statements
-        for match in re.finditer(r'use\s+([\w:]+)', content):
-            analysis['uses'].append(match.group(1))
+        for match in _RS_USE_RE.finditer(content):
+            analysis['uses'].append(_decode(match.group(1)))
         
         # Structs
-        for match in re.finditer(r'struct\s+(\w+)', content):
-            analysis['structs'].append(match.group(1))
+        for match in _RS_STRUCT_RE.finditer(content):
+            analysis['structs'].append(_decode(match.group(1)))
         
         # Functions
-        for match in re.finditer(r'fn\s+(\w+)', content):
-            analysis['functions'].append(match.group(1))
+        for match in _RS_FUNC_RE.finditer(content):
+            analysis['functions'].append(_decode(match.group(1)))
         
         # Impl blocks
-        for match in re.finditer(r'impl(?:\s+<[^>]+>)?\s+(\w+)', content):
-            analysis['impls'].append(match.group(1))
+        for match in _RS_IMPL_RE.finditer(content):
+            analysis['impls'].append(_decode(match.group(1)))
         
         return analysis
     
-    def _analyze_generic(self, content: str) -> Dict:
+    def _analyze_generic(self, content: bytes) -> Dict:
         """Generic analysis for other languages."""
         return {
             'language': 'Unknown',
-            'lines': len(content.split('\n')),
+            'lines': content.count(b'\n') + 1,
             'size': len(content)
         }
 
@@ -253,50 +424,105 @@ class AIGenerator:
         self.api_key = api_key or OPENROUTER_API_KEY
         self.base_url = OPENROUTER_BASE_URL
         self.model = DEFAULT_MODEL
+        
+        # One client for all calls so connections are pooled and reused. With
+        # httpx + h2 the concurrent batch requests share a single HTTP/2 connection.
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+            "HTTP-Referer": "https://github.com/vacationtube2024-droid/alita-repo-001",
+            "X-Title": "Alita Auto-Doc Generator"
+        }
+        if httpx is not None:
+            self._session = httpx.Client(http2=HTTP2_AVAILABLE, headers=headers, timeout=60)
+        else:
+            self._session = requests.Session()
+            self._session.headers.update(headers)
     
     def generate_documentation(self, analysis_results: List[Dict]) -> str:
         """Generate documentation using AI."""
         if self.api_key == "API_KEY" or not self.api_key:
             return self._generate_fallback(analysis_results)
         
-        # Prepare code summary for AI
-        code_summary = self._prepare_summary(analysis_results)
+        # Prepare code summaries for AI, split so each call fits the model window
+        batches = self._batch_summaries(analysis_results)
         
-        # Call OpenRouter API
+        # Call OpenRouter API, one request per batch
         try:
-            response = self._call_api(code_summary)
-            return response
+            if len(batches) == 1:
+                return self._call_api(self._readme_prompt(batches[0]))
+            
+            # Several batches: each part documents only its own files, and the
+            # project-level sections are written once from a compact overview
+            total = len(batches)
+            with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_REQUESTS, total + 1)) as executor:
+                overview = executor.submit(
+                    self._call_api, self._overview_prompt(self._project_overview(analysis_results))
+                )
+                references = executor.map(
+                    lambda part: self._call_api(self._reference_prompt(batches[part - 1], part, total)),
+                    range(1, total + 1)
+                )
+                return "\n\n".join([overview.result(), "## API Reference", *references])
         except Exception as e:
             return f"# Documentation\n\n*AI generation failed: {e}*\n\n" + self._generate_fallback(analysis_results)
     
-    def _prepare_summary(self, results: List[Dict]) -> str:
-        """Prepare code summary for AI."""
+    def _batch_summaries(self, results: List[Dict]) -> List[str]:
+        """Group per-file summaries into prompts of at most SUMMARY_TOKEN_BUDGET tokens."""
+        batches = []
+        current = []
+        current_tokens = 0
+        for r in results:
+            if 'error' in r:
+                continue
+            section = self._summarize_file(r)
+            tokens = len(section) // 4
+            if current and current_tokens + tokens > SUMMARY_TOKEN_BUDGET:
+                batches.append("\n".join(current))
+                current = []
+                current_tokens = 0
+            current.append(section)
+            current_tokens += tokens
+        batches.append("\n".join(current))
+        return batches
+    
+    def _summarize_file(self, r: Dict) -> str:
+        """Summarize a single analyzed file."""
         summary = []
+        summary.append(f"## {r.get('name', 'Unknown')}")
+        if r.get('docstring'):
+            summary.append(f"Docstring: {r['docstring']}")
+        if r.get('classes'):
+            summary.append(f"Classes: {', '.join(c['name'] for c in r['classes'])}")
+        if r.get('functions'):
+            summary.append(f"Functions: {', '.join(f['name'] for f in r['functions'])}")
+        if r.get('imports'):
+            summary.append(f"Imports: {', '.join(r['imports'][:5])}")
+        summary.append("")
+        return "\n".join(summary)
+    
+    def _project_overview(self, results: List[Dict]) -> str:
+        """Languages and one line per file, cut to SUMMARY_TOKEN_BUDGET tokens."""
+        by_lang = Counter(r.get('language', 'Unknown') for r in results if 'error' not in r)
+        lines = [f"Total files: {sum(by_lang.values())}"]
+        lines.append("Languages: " + ", ".join(f"{lang} ({count})" for lang, count in sorted(by_lang.items())))
+        budget = SUMMARY_TOKEN_BUDGET * 4 - len("\n".join(lines))
         for r in results:
             if 'error' in r:
                 continue
-            summary.append(f"## {r.get('name', 'Unknown')}")
+            line = f"- {r.get('name', 'Unknown')}"
             if r.get('docstring'):
-                summary.append(f"Docstring: {r['docstring']}")
-            if r.get('classes'):
-                summary.append(f"Classes: {', '.join([c['name'] for c in r['classes']])}")
-            if r.get('functions'):
-                summary.append(f"Functions: {', '.join([f['name'] for f in r['functions']])}")
-            if r.get('imports'):
-                summary.append(f"Imports: {', '.join(r['imports'][:5])}")
-            summary.append("")
-        return "\n".join(summary)
+                line += f": {r['docstring'].splitlines()[0][:80]}"
+            budget -= len(line) + 1
+            if budget < 0:
+                lines.append("- ...")
+                break
+            lines.append(line)
+        return "\n".join(lines)
     
-    def _call_api(self, code_summary: str) -> str:
-        """Call OpenRouter API."""
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-            "HTTP-Referer": "https://github.com/vacationtube2024-droid/alita-repo-001",
-            "X-Title": "Alita Auto-Doc Generator"
-        }
-        
-        prompt = f"""You are a code documentation expert. Analyze the following code structure and generate a comprehensive README.md for this project.
+    def _readme_prompt(self, code_summary: str) -> str:
+        """Prompt for a full README from the whole code summary."""
+        return f"""You are a code documentation expert. Analyze the following code structure and generate a comprehensive README.md for this project.
 
 Code Structure:
 {code_summary}
@@ -309,7 +535,39 @@ Generate a professional README.md with:
 5. Any other relevant documentation
 
 Write in markdown format."""
+    
+    def _overview_prompt(self, overview: str) -> str:
+        """Prompt for the project-level README sections of a multi-part run."""
+        return f"""You are a code documentation expert. Analyze the following project overview and generate the project-level sections of a README.md.
+
+Project Overview:
+{overview}
+
+Generate a professional README.md with:
+1. Project title and description
+2. Installation instructions
+3. Usage examples
+4. Any other relevant documentation
+
+The API/Function reference is generated separately; do not include it.
+
+Write in markdown format."""
+    
+    def _reference_prompt(self, code_summary: str, part: int, total: int) -> str:
+        """Prompt for the API reference of one batch of files."""
+        return f"""You are a code documentation expert. Analyze the following code structure and generate the API/Function reference for these files.
+
+This is part {part} of {total} of the codebase; document only the files listed below.
+
+Code Structure:
+{code_summary}
 
+Write one "### <file name>" subsection per file describing its classes and functions. Do not add a project title, installation, usage or any other README sections.
+
+Write in markdown format."""
+    
+    def _call_api(self, prompt: str) -> str:
+        """Call OpenRouter API with one prompt."""
         payload = {
             "model": self.model,
             "messages": [
@@ -320,9 +578,8 @@ Write in markdown format."""
             "temperature": 0.7
         }
         
-        response = requests.post(
+        response = self._session.post(
             f"{self.base_url}/chat/completions",
-            headers=headers,
             json=payload,
             timeout=60
         )
@@ -334,36 +591,31 @@ Write in markdown format."""
     
     def _generate_fallback(self, results: List[Dict]) -> str:
         """Generate basic documentation without AI."""
-        readme = "# Project Documentation\n\n"
-        readme += f"**Total Files:** {len(results)}\n\n"
+        parts = ["# Project Documentation\n\n"]
+        parts.append(f"**Total Files:** {len(results)}\n\n")
         
-        # Group by language
-        by_lang = {}
-        for r in results:
-            lang = r.get('language', 'Unknown')
-            if lang not in by_lang:
-                by_lang[lang] = []
-            by_lang[lang].append(r)
+        # Count files per language
+        by_lang = Counter(r.get('language', 'Unknown') for r in results)
         
-        readme += "## Files by Language\n\n"
-        for lang, files in sorted(by_lang.items()):
-            readme += f"- **{lang}**: {len(files)} files\n"
+        parts.append("## Files by Language\n\n")
+        for lang, count in sorted(by_lang.items()):
+            parts.append(f"- **{lang}**: {count} files\n")
         
-        readme += "\n## Code Structure\n\n"
+        parts.append("\n## Code Structure\n\n")
         for r in results:
             if 'error' in r:
                 continue
-            readme += f"### {r.get('name', 'Unknown')}\n"
+            parts.append(f"### {r.get('name', 'Unknown')}\n")
             if r.get('docstring'):
-                readme += f"_{r['docstring']}_\n\n"
+                parts.append(f"_{r['docstring']}_\n\n")
             if r.get('classes'):
-                readme += f"**Classes:** {', '.join([c['name'] for c in r['classes']])}\n"
+                parts.append(f"**Classes:** {', '.join(c['name'] for c in r['classes'])}\n")
             if r.get('functions'):
-                readme += f"**Functions:** {', '.join([f['name'] for f in r['functions']])}\n"
-            readme += "\n"
+                parts.append(f"**Functions:** {', '.join(f['name'] for f in r['functions'])}\n")
+            parts.append("\n")
         
-        readme += "---\n*Generated by Alita Auto-Code Documenter*\n"
-        return readme
+        parts.append("---\n*Generated by Alita Auto-Code Documenter*\n")
+        return "".join(parts)
 
 
 # ============================================================================
@@ -387,13 +639,14 @@ class AutoDocGenerator:
         files = self.scanner.scan()
         print(f"📊 Found {len(files)} code files")
         
-        # Step 2: Analyze each file
+        # Step 2: Analyze each file (independent and CPU-bound, so spread across processes)
         analysis_results = []
-        for f in files:
-            print(f"  Analyzing: {f['name']}")
-            analysis = self.analyzer.analyze(f['path'])
-            analysis['file'] = f
-            analysis_results.append(analysis)
+        with ProcessPoolExecutor() as executor:
+            analyses = executor.map(self.analyzer.analyze, [f['path'] for f in files], chunksize=16)
+            for f, analysis in zip(files, analyses):
+                print(f"  Analyzed: {f['name']}")
+                analysis['file'] = f
+                analysis_results.append(analysis)
         
         # Step 3: Generate documentation
         if use_ai:
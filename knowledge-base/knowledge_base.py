@@ -6,10 +6,26 @@ An AI-powered knowledge management system.
 
 import os
 import json
+from collections import Counter
 from pathlib import Path
 from typing import List, Dict, Optional
 from dataclasses import dataclass
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _dumps(obj) -> bytes:
+    """Serialize obj to JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str)
+    return json.dumps(obj, default=str).encode()
+
+
+_loads = orjson.loads if orjson is not None else json.loads
+
 
 @dataclass
 class Document:
@@ -27,6 +43,7 @@ class KnowledgeBase:
         self.storage_path = Path(storage_path)
         self.storage_path.mkdir(parents=True, exist_ok=True)
         self.documents: List[Document] = []
+        self._by_id: Dict[str, Document] = {}
         self.index = {}
         
     def index_document(self, file_path: str, content: str, metadata: Dict = None) -> str:
@@ -38,65 +55,70 @@ class KnowledgeBase:
             source=file_path,
             metadata=metadata or {}
         )
+        self._add(doc)
+        self._append(doc)
+        return doc_id
+    
+    def _add(self, doc: Document):
+        """Add a document to the in-memory store and keyword index."""
         self.documents.append(doc)
+        self._by_id[doc.id] = doc
         
         # Simple keyword-based indexing (can be upgraded to embeddings)
-        words = content.lower().split()
+        words = doc.content.lower().split()
         for word in words:
             if word not in self.index:
                 self.index[word] = []
-            self.index[word].append(doc_id)
-            
-        self._save()
-        return doc_id
+            self.index[word].append(doc.id)
     
     def search(self, query: str, top_k: int = 5) -> List[Document]:
         """Search the knowledge base for relevant documents."""
         query_words = query.lower().split()
-        scores = {}
+        scores = Counter()
         
+        # One hit per posting of every query word
         for word in query_words:
-            if word in self.index:
-                for doc_id in self.index[word]:
-                    scores[doc_id] = scores.get(doc_id, 0) + 1
+            scores.update(self.index.get(word, ()))
         
-        # Sort by score
-        sorted_ids = sorted(scores.items(), key=lambda x: x[1], reverse=True)
-        return [self.get_doc_by_id(doc_id) for doc_id, _ in sorted_ids[:top_k]]
+        return [self.get_doc_by_id(doc_id) for doc_id, _ in scores.most_common(top_k)]
     
     def get_doc_by_id(self, doc_id: str) -> Optional[Document]:
         """Get a document by ID."""
-        for doc in self.documents:
-            if doc.id == doc_id:
-                return doc
-        return None
+        return self._by_id.get(doc_id)
     
-    def _save(self):
-        """Save the knowledge base to disk."""
-        data = [
-            {
-                'id': d.id,
-                'content': d.content,
-                'source': d.source,
-                'metadata': d.metadata
-            }
-            for d in self.documents
-        ]
-        with open(self.storage_path / "index.json", 'w') as f:
-            json.dump({'documents': data, 'index': self.index}, f)
+    def _append(self, doc: Document):
+        """Append a document to the on-disk log (one JSON object per line)."""
+        record = {
+            'id': doc.id,
+            'content': doc.content,
+            'source': doc.source,
+            'metadata': doc.metadata
+        }
+        with open(self.storage_path / "docs.jsonl", 'ab') as f:
+            f.write(_dumps(record) + b"\n")
     
     def _load(self):
         """Load the knowledge base from disk."""
         try:
-            with open(self.storage_path / "index.json", 'r') as f:
-                data = json.load(f)
-                self.documents = [
-                    Document(d['id'], d['content'], d['source'], d['metadata'])
-                    for d in data['documents']
-                ]
-                self.index = data.get('index', {})
+            with open(self.storage_path / "docs.jsonl", 'rb') as f:
+                for line in f:
+                    if line.strip():
+                        d = _loads(line)
+                        self._add(Document(d['id'], d['content'], d['source'], d['metadata']))
+        except FileNotFoundError:
+            self._migrate_legacy()
+    
+    def _migrate_legacy(self):
+        """Convert an index.json written by older versions to the docs.jsonl log."""
+        try:
+            with open(self.storage_path / "index.json", 'rb') as f:
+                data = _loads(f.read())
         except FileNotFoundError:
-            pass
+            return
+        for d in data['documents']:
+            doc = Document(d['id'], d['content'], d['source'], d['metadata'])
+            self._add(doc)
+            self._append(doc)
     
     def query(self, question: str) -> str:
         """Query the knowledge base using RAG-like approach."""
@@ -5,12 +5,62 @@ Enhanced AI-powered knowledge management with vector embeddings.
 """
 
 import os
+import re
 import json
-import hashlib
+import zlib
+from collections import Counter
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from dataclasses import dataclass, asdict
 
+import numpy as np
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _dumps(obj) -> bytes:
+    """Serialize obj to JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str)
+    return json.dumps(obj, default=str).encode()
+
+
+_loads = orjson.loads if orjson is not None else json.loads
+
+
+def _write_at(path: Path, offset: int, data: bytes) -> int:
+    """Write data at offset, dropping anything after it; returns the new size."""
+    with open(path, 'r+b' if path.exists() else 'wb') as f:
+        f.truncate(offset)
+        f.seek(offset)
+        f.write(data)
+    return offset + len(data)
+
+
+@lru_cache(maxsize=None)
+def _chunk_pattern(chunk_size: int) -> re.Pattern:
+    """Pattern matching runs of up to chunk_size whitespace-separated words."""
+    return re.compile(rf'\S+(?:\s+\S+){{0,{chunk_size - 1}}}')
+
+
+EMBEDDING_DIM = 100
+
+
+@lru_cache(maxsize=65536)
+def _word_bucket(word: str) -> int:
+    """Embedding dimension a word is hashed into."""
+    # Any stable hash works here; crc32 is a C call returning an int directly
+    return zlib.crc32(word.encode()) % EMBEDDING_DIM
+
+
+def _embed_from_buckets(buckets: np.ndarray, weights: np.ndarray, dim: int = EMBEDDING_DIM) -> np.ndarray:
+    """Sum the word frequencies falling into each dimension in a single pass."""
+    return np.bincount(buckets, weights=weights, minlength=dim).astype(np.float32)
+
 
 @dataclass
 class Document:
@@ -28,12 +78,8 @@ class Document:
     @staticmethod
     def chunk_text(text: str, chunk_size: int = 500) -> List[str]:
         """Split text into chunks."""
-        words = text.split()
-        chunks = []
-        for i in range(0, len(words), chunk_size):
-            chunk = ' '.join(words[i:i+chunk_size])
-            chunks.append(chunk)
-        return chunks
+        # Each match is one chunk sliced straight from text; no word list or re-joining
+        return _chunk_pattern(chunk_size).findall(text)
 
 
 class VectorStore:
@@ -41,37 +87,45 @@ class VectorStore:
     
     def __init__(self):
         self.documents = []
-        self.embeddings = []
+        # Unit-length embeddings, so cosine similarity is a plain dot product
+        self.embeddings: List[np.ndarray] = []
+        # (N, D) matrix stacked lazily on the first search after an add
+        self._matrix: Optional[np.ndarray] = None
         
     def add(self, doc: Document, embedding: List[float]):
         """Add document with embedding."""
+        emb = np.array(embedding, dtype=np.float32)
+        emb /= np.linalg.norm(emb) + 1e-9
         self.documents.append(doc)
-        self.embeddings.append(embedding)
+        self.embeddings.append(emb)
+        self._matrix = None
+        
+    def matrix(self) -> np.ndarray:
+        """All stored embeddings as an (N, D) float32 matrix."""
+        if self._matrix is None:
+            if self.embeddings:
+                self._matrix = np.vstack(self.embeddings)
+            else:
+                self._matrix = np.empty((0, EMBEDDING_DIM), dtype=np.float32)
+        return self._matrix
         
     def search(self, query_embedding: List[float], top_k: int = 5) -> List[Document]:
         """Search for similar documents using cosine similarity."""
-        if not self.embeddings:
+        if not self.embeddings or top_k <= 0:
             return []
             
-        # Simple cosine similarity
-        scores = []
-        for emb in self.embeddings:
-            score = self._cosine_similarity(query_embedding, emb)
-            scores.append(score)
+        # Cosine similarity against every stored embedding in one matrix-vector product
+        query = np.array(query_embedding, dtype=np.float32)
+        query /= np.linalg.norm(query) + 1e-9
+        scores = self.matrix() @ query
             
-        # Get top k
-        top_indices = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)[:top_k]
+        # Get top k without sorting all N scores (a full sort when every score is kept)
+        if top_k >= len(scores):
+            top_indices = np.argsort(-scores, kind='stable')
+        else:
+            top_indices = np.argpartition(-scores, top_k - 1)[:top_k]
+            top_indices = top_indices[np.argsort(-scores[top_indices], kind='stable')]
         return [self.documents[i] for i in top_indices]
-    
-    @staticmethod
-    def _cosine_similarity(a: List[float], b: List[float]) -> float:
-        """Calculate cosine similarity."""
-        dot = sum(x*y for x, y in zip(a, b))
-        norm_a = sum(x*x for x in a) ** 0.5
-        norm_b = sum(x*x for x in b) ** 0.5
-        if norm_a == 0 or norm_b == 0:
-            return 0
-        return dot / (norm_a * norm_b)
 
 
 class KnowledgeBaseV2:
@@ -82,28 +136,27 @@ class KnowledgeBaseV2:
         self.storage_path.mkdir(parents=True, exist_ok=True)
         self.vector_store = VectorStore()
         self.documents = []
+        # (start, end) byte offsets of each document's line in kb_v2.jsonl
+        self._spans: List[Tuple[int, int]] = []
         
-    def _generate_embedding(self, text: str) -> List[float]:
+    @staticmethod
+    def _tokenize(text: str) -> List[str]:
+        """Split text into lowercase words."""
+        return text.lower().split()
+    
+    def _generate_embedding(self, text: str) -> np.ndarray:
         """
         Generate a simple embedding using hash-based approach.
         In production, use OpenAI embeddings or sentence-transformers.
         """
         # Simple hash-based "embedding" for demo
         # This creates a pseudo-embedding based on word frequencies
-        words = text.lower().split()
-        embedding = [0.0] * 100
+        counts = Counter(self._tokenize(text))
+        buckets = np.fromiter((_word_bucket(w) for w in counts), dtype=np.int64, count=len(counts))
+        frequencies = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
         
-        for i, word in enumerate(set(words)):
-            hash_val = int(hashlib.md5(word.encode()).hexdigest(), 16) % 100
-            frequency = words.count(word)
-            embedding[hash_val] = frequency
-            
-        # Normalize
-        magnitude = sum(x*x for x in embedding) ** 0.5
-        if magnitude > 0:
-            embedding = [x/magnitude for x in embedding]
-            
-        return embedding
+        # Normalization happens once in VectorStore (at insert and per query)
+        return _embed_from_buckets(buckets, frequencies)
     
     def index_document(self, file_path: str, content: str, metadata: Dict = None) -> str:
         """Add a document to the knowledge base."""
@@ -115,39 +168,126 @@ class KnowledgeBaseV2:
             metadata=metadata or {}
         )
         
+        self._add(doc)
+        self._spans.append(self._append(doc))
+        self._save_embeddings()
+        return doc_id
+    
+    def _add(self, doc: Document, embeddings: Optional[np.ndarray] = None):
+        """Add a document and its chunk embeddings to memory."""
         self.documents.append(doc)
         
-        # Generate embedding for each chunk
-        for chunk in doc.chunks:
-            embedding = self._generate_embedding(chunk)
+        # Generate embedding for each chunk unless they were loaded from disk
+        if embeddings is None:
+            embeddings = [self._generate_embedding(chunk) for chunk in doc.chunks]
+        for embedding in embeddings:
             self.vector_store.add(doc, embedding)
-            
-        self._save()
-        return doc_id
     
     def search(self, query: str, top_k: int = 5) -> List[Document]:
         """Semantic search using embeddings."""
         query_embedding = self._generate_embedding(query)
         return self.vector_store.search(query_embedding, top_k)
     
-    def _save(self):
-        """Save to disk."""
-        data = [asdict(d) for d in self.documents]
-        with open(self.storage_path / "kb_v2.json", 'w') as f:
-            json.dump({'documents': data}, f, indent=2)
+    def _append(self, doc: Document) -> Tuple[int, int]:
+        """Append a document to the on-disk log (one JSON object per line); returns its span."""
+        with open(self.storage_path / "kb_v2.jsonl", 'ab') as f:
+            start = f.tell()
+            f.write(_dumps(asdict(doc)) + b"\n")
+            return start, f.tell()
+    
+    def _read_meta(self) -> Dict:
+        """Committed state of kb_v2_embeddings.bin: its rows embed the first documents_bytes of the log."""
+        try:
+            with open(self.storage_path / "kb_v2_meta.json", 'rb') as f:
+                meta = _loads(f.read())
+            if meta['dim'] == EMBEDDING_DIM:
+                return {'documents_bytes': meta['documents_bytes'], 'rows': meta['rows'], 'dim': EMBEDDING_DIM}
+        except (OSError, ValueError, KeyError):
+            pass
+        return {'documents_bytes': 0, 'rows': 0, 'dim': EMBEDDING_DIM}
+    
+    def _save_embeddings(self):
+        """Append the embeddings of documents logged right after the committed ones."""
+        # Start from what is on disk: this instance may not hold the whole log
+        meta = self._read_meta()
+        logged = meta['documents_bytes']
+        new_rows = []
+        row = 0
+        for doc, (start, end) in zip(self.documents, self._spans):
+            if start == logged:
+                new_rows.extend(self.vector_store.embeddings[row:row + len(doc.chunks)])
+                logged = end
+            elif start > logged:
+                break  # Logged documents in between are not in memory; _load() embeds them
+            row += len(doc.chunks)
+        if not new_rows:
+            return
+        
+        row_bytes = EMBEDDING_DIM * np.dtype(np.float32).itemsize
+        _write_at(self.storage_path / "kb_v2_embeddings.bin", meta['rows'] * row_bytes, np.vstack(new_rows).tobytes())
+        meta.update(documents_bytes=logged, rows=meta['rows'] + len(new_rows))
+        
+        tmp_path = self.storage_path / "kb_v2_meta.json.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(_dumps(meta))
+        os.replace(tmp_path, self.storage_path / "kb_v2_meta.json")
     
     def _load(self):
         """Load from disk."""
         try:
-            with open(self.storage_path / "kb_v2.json", 'r') as f:
-                data = json.load(f)
-                self.documents = [Document(**d) for d in data['documents']]
-                for doc in self.documents:
-                    for chunk in doc.chunks:
-                        embedding = self._generate_embedding(chunk)
-                        self.vector_store.add(doc, embedding)
+            with open(self.storage_path / "kb_v2.jsonl", 'rb') as f:
+                lines = f.readlines()
         except FileNotFoundError:
-            pass
+            self._migrate_legacy()
+            return
+        
+        docs, spans = [], []
+        end = 0
+        for line in lines:
+            start, end = end, end + len(line)
+            if line.strip():
+                docs.append(Document(**_loads(line)))
+                spans.append((start, end))
+        
+        # Reuse the rows of the committed log prefix; documents after it are re-embedded
+        meta = self._read_meta()
+        committed = sum(1 for _, stop in spans if stop <= meta['documents_bytes'])
+        covered = sum(len(d.chunks) for d in docs[:committed])
+        if covered != meta['rows'] or (committed and spans[committed - 1][1] != meta['documents_bytes']):
+            # Out of sync with the log: embed everything again
+            (self.storage_path / "kb_v2_meta.json").unlink(missing_ok=True)
+            committed = covered = 0
+        embeddings = None
+        if covered:
+            try:
+                embeddings = np.memmap(self.storage_path / "kb_v2_embeddings.bin", dtype=np.float32,
+                                       mode='r', shape=(covered, EMBEDDING_DIM))
+            except (OSError, ValueError):
+                (self.storage_path / "kb_v2_meta.json").unlink(missing_ok=True)
+        
+        row = 0
+        for i, doc in enumerate(docs):
+            if embeddings is not None and i < committed:
+                self._add(doc, embeddings[row:row + len(doc.chunks)])
+            else:
+                self._add(doc)
+            row += len(doc.chunks)
+        self._spans = spans
+        
+        self._save_embeddings()
+    
+    def _migrate_legacy(self):
+        """Convert a kb_v2.json written by older versions to the kb_v2.jsonl log."""
+        try:
+            with open(self.storage_path / "kb_v2.json", 'rb') as f:
+                data = _loads(f.read())
+        except FileNotFoundError:
+            return
+        for d in data['documents']:
+            doc = Document(**d)
+            self._add(doc)
+            self._spans.append(self._append(doc))
+        self._save_embeddings()
     
     def query(self, question: str) -> str:
         """Query with RAG-like approach."""
@@ -7,12 +7,43 @@ This version uses OpenRouter API for intelligent Q&A using RAG.
 """
 
 import os
+import re
 import json
 import hashlib
+import shutil
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Iterator, Optional, Tuple
 from dataclasses import dataclass, asdict
+from functools import lru_cache
+from itertools import chain, islice
+from operator import itemgetter
+
+import numpy as np
+
+try:
+    import simsimd
+except ImportError:
+    simsimd = None
+
+try:
+    from usearch.index import Index as HNSWIndex
+except ImportError:
+    HNSWIndex = None
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
 # ============================================================================
@@ -24,8 +55,140 @@ OPENROUTER_API_KEY = os.environ.get("OPENROUTER_API_KEY", "API_KEY")
 OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
 DEFAULT_MODEL = "openrouter/auto"
 
+# HTTP connection pooling and retries for API calls
+HTTP_POOL_CONNECTIONS = 8
+HTTP_POOL_MAXSIZE = 32
+HTTP_MAX_RETRIES = 3
+MAX_CONCURRENT_REQUESTS = 8  # Embedding windows in flight at once while indexing
+
 # Embedding configuration
+EMBEDDING_MODEL = "openai/text-embedding-3-small"
 EMBEDDING_DIM = 1536  # OpenAI default
+EMBEDDING_INPUT_CHARS = 8000  # Per-text input limit
+EMBEDDING_BATCH_SIZE = 2048  # Max texts per /embeddings request
+EMBEDDING_BATCH_CHARS = 1_000_000  # ~250k tokens, under the per-request token limit
+CACHE_KEY_BYTES = 16  # blake2b digest size of embedding cache keys
+HASH_BUCKET_WEIGHTS = np.array([3.0, 2.0, 1.0])  # Fallback embedder weight per hash bucket
+# Recorded in meta.json; change it whenever the fallback embedding changes so
+# stored rows are embedded again
+HASH_EMBEDDER = "hash-blake2b-v1"
+
+# HNSW index parameters (used when usearch is installed)
+HNSW_CONNECTIVITY = 16
+HNSW_EXPANSION_ADD = 200
+HNSW_EXPANSION_SEARCH = 64
+
+# Exact search scans int8 codes first, then re-ranks this many candidates
+# per requested result in float32. Only with SimSIMD, and only when usearch
+# is missing: the HNSW graph answers every search otherwise
+QUANTIZED_SEARCH = simsimd is not None and HNSWIndex is None
+QUANTIZED_RERANK_FACTOR = 4
+
+# Embedding rows are held as float16 for the quantized search (half the
+# memory; re-ranked cosine scores move by ~1e-3 at most), else float32
+EMBEDDING_STORAGE_DTYPE = np.float16 if QUANTIZED_SEARCH else np.float32
+
+# Exact scans run over row blocks sized to stay resident in L2 cache
+L2_BYTES = 1 << 20
+
+# Chunking configuration
+CHUNK_OVERLAP = 50  # Words overlap between chunks
+INDEX_WINDOW_CHUNKS = 64  # Chunks embedded and stored at a time while indexing
+
+
+def _write_at(path: Path, offset: int, data: bytes) -> int:
+    """Write data at offset, dropping anything after it; returns the new size."""
+    with open(path, 'r+b' if path.exists() else 'wb') as f:
+        f.truncate(offset)
+        f.seek(offset)
+        f.write(data)
+    return offset + len(data)
+
+
+def _dumps(obj) -> bytes:
+    """Serialize obj to JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str)
+    return json.dumps(obj, default=str).encode()
+
+
+_loads = orjson.loads if orjson is not None else json.loads
+
+
+@lru_cache(maxsize=None)
+def _chunk_pattern(chunk_size: int) -> re.Pattern:
+    """Pattern matching one chunk stride plus, via lookahead, its overlap words."""
+    stride = chunk_size - CHUNK_OVERLAP
+    return re.compile(rf'(\S+(?:\s+\S+){{0,{stride - 1}}})(?=((?:\s+\S+){{0,{CHUNK_OVERLAP}}}))')
+
+
+@lru_cache(maxsize=65536)
+def _token_buckets(token: str) -> Tuple[int, int, int]:
+    """Three embedding dimensions a token is hashed into."""
+    # One stable 64-bit hash split three ways instead of md5 + sha256 + sha1
+    h = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), 'little')
+    return h % EMBEDDING_DIM, (h >> 21) % EMBEDDING_DIM, (h >> 42) % EMBEDDING_DIM
+
+
+def _quantize(vectors: np.ndarray) -> np.ndarray:
+    """Symmetric int8 codes per vector (cosine ignores the scale, so it is not kept)."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    peak = np.abs(vectors).max(axis=-1, keepdims=True, initial=0.0)
+    return np.round(vectors * (127.0 / (peak + 1e-9))).astype(np.int8)
+
+
+def _numpy_has_blas() -> bool:
+    """Whether NumPy was built against an optimized BLAS (assumed on NumPy < 1.26)."""
+    try:
+        blas = np.show_config(mode='dicts')['Build Dependencies']['blas']
+    except (TypeError, KeyError):
+        return True
+    return bool(blas.get('found'))
+
+
+# Without BLAS, np.dot runs NumPy's own scalar loop; the exact scan then uses
+# these compiled kernels instead
+if njit is not None and not _numpy_has_blas():
+    @njit(cache=True, fastmath=True)
+    def _cosine_nb(a, b):
+        """Cosine similarity of two vectors in one fused pass."""
+        dot = 0.0
+        na = 0.0
+        nb = 0.0
+        for i in range(a.shape[0]):
+            dot += a[i] * b[i]
+            na += a[i] * a[i]
+            nb += b[i] * b[i]
+        return dot / (np.sqrt(na * nb) + 1e-9)
+    
+    @njit(cache=True, fastmath=True, parallel=True)
+    def _batch_cosine(matrix, query, out):
+        """Cosine similarity of every matrix row with query, rows split across cores."""
+        for i in prange(matrix.shape[0]):
+            out[i] = _cosine_nb(matrix[i], query)
+else:
+    _batch_cosine = None
+
+
+def _new_session(api_key: str) -> requests.Session:
+    """HTTP session that keeps connections alive and retries transient failures."""
+    session = requests.Session()
+    session.headers.update({
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json",
+        "HTTP-Referer": "https://github.com/vacationtube2024-droid/alita-repo-001",
+        "X-Title": "Alita Knowledge Base"
+    })
+    retries = Retry(
+        total=HTTP_MAX_RETRIES,
+        backoff_factor=0.3,
+        status_forcelist=(429, 502, 503, 504),
+        allowed_methods=frozenset({"POST"})
+    )
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE, max_retries=retries)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
 
 
 # ============================================================================
@@ -45,21 +208,30 @@ class Document:
         if self.chunks is None:
             self.chunks = self.chunk_text(self.content)
     
+    def chunks_iter(self, chunk_size: int = 500) -> Iterator[str]:
+        """Lazily yield the chunks of this document's content."""
+        return self.iter_chunks(self.content, chunk_size)
+    
     @staticmethod
     def chunk_text(text: str, chunk_size: int = 500) -> List[str]:
         """Split text into overlapping chunks."""
-        words = text.split()
-        chunks = []
-        overlap = 50  # Words overlap between chunks
-        
-        for i in range(0, len(words), chunk_size - overlap):
-            chunk = ' '.join(words[i:i+chunk_size])
-            if chunk:
-                chunks.append(chunk)
-            if i + chunk_size >= len(words):
+        return list(Document.iter_chunks(text, chunk_size))
+    
+    @staticmethod
+    def iter_chunks(text: str, chunk_size: int = 500) -> Iterator[str]:
+        """Yield overlapping chunks of text one at a time."""
+        text_end = len(text.rstrip())
+        
+        # Each chunk is sliced straight from text; no word list or re-joining
+        found = False
+        for match in _chunk_pattern(chunk_size).finditer(text):
+            found = True
+            yield text[match.start(1):match.end(2)]
+            if match.end(2) >= text_end:
                 break
-                
-        return chunks if chunks else [text]
+        
+        if not found:
+            yield text
 
 
 # ============================================================================
@@ -70,54 +242,285 @@ class VectorStore:
     """Simple in-memory vector store with cosine similarity."""
     
     def __init__(self):
-        self.documents = []
-        self.embeddings = []
+        self.docs = []
+        # Row i holds the unit-length embedding of one chunk of
+        # docs[chunk_to_doc[i]], so cosine similarity is a plain dot product.
+        # Capacity doubles when full.
+        self._buffer = np.empty((0, 0), dtype=EMBEDDING_STORAGE_DTYPE)
+        self._chunk_to_doc = np.empty(0, dtype=np.int32)
+        # int8 copy of the same rows for the coarse scan (a quarter of the bytes),
+        # kept only for QUANTIZED_SEARCH; None until built from the rows
+        self._codes = np.empty((0, 0), dtype=np.int8) if QUANTIZED_SEARCH else None
+        self._size = 0
+        # Approximate nearest-neighbour graph over the same rows (labels are row numbers)
+        self._hnsw = None
+        # What produced the rows (EMBEDDING_MODEL or HASH_EMBEDDER); None for
+        # stores from older versions, which did not record it
+        self.embedder = None
+        # How much of docs and rows save() has already written (mirrors meta.json)
+        self._saved = {'documents': 0, 'documents_bytes': 0, 'rows': 0, 'code_rows': 0, 'dim': 0, 'dtype': None}
+    
+    @property
+    def embeddings(self) -> np.ndarray:
+        """Stored embeddings as an (N, D) matrix view."""
+        return self._buffer[:self._size]
+    
+    @property
+    def codes(self) -> np.ndarray:
+        """Quantized embeddings as an (N, D) int8 matrix view."""
+        if self._codes is None:
+            self._codes = self._build_codes()
+        return self._codes[:self._size]
+    
+    @property
+    def chunk_to_doc(self) -> np.ndarray:
+        """Index into docs of the document each row belongs to."""
+        return self._chunk_to_doc[:self._size]
+    
+    @property
+    def num_chunks(self) -> int:
+        """Number of stored chunk embeddings."""
+        return self._size
+    
+    def add_document(self, doc: Document) -> int:
+        """Store a document once and return its index for add()."""
+        self.docs.append(doc)
+        return len(self.docs) - 1
+    
+    def add(self, doc_idx: int, embedding: List[float]):
+        """Add the embedding of one chunk of docs[doc_idx]."""
+        vector = np.array(embedding, dtype=np.float32)
+        vector /= np.linalg.norm(vector) + 1e-9
+        
+        if self._size == len(self._buffer):
+            self._grow(len(vector))
+        self._buffer[self._size] = vector
+        if self._codes is not None:
+            self._codes[self._size] = _quantize(vector)
+        self._chunk_to_doc[self._size] = doc_idx
+        if HNSWIndex is not None:
+            if self._hnsw is None:
+                self._hnsw = self._new_hnsw(len(vector))
+            self._hnsw.add(self._size, vector)
+        self._size += 1
     
-    def add(self, doc: Document, embedding: List[float]):
-        """Add document with embedding."""
-        self.documents.append(doc)
-        self.embeddings.append(embedding)
+    @staticmethod
+    def _new_hnsw(dim: int):
+        """Create an empty HNSW index for dim-dimensional vectors."""
+        return HNSWIndex(
+            ndim=dim,
+            metric='cos',
+            dtype='f32',
+            connectivity=HNSW_CONNECTIVITY,
+            expansion_add=HNSW_EXPANSION_ADD,
+            expansion_search=HNSW_EXPANSION_SEARCH
+        )
+    
+    def _load_hnsw(self, graph_path: Path):
+        """Load the saved HNSW graph, rebuilding it from the embeddings if stale."""
+        self._hnsw = self._new_hnsw(self.embeddings.shape[1])
+        if graph_path.exists():
+            try:
+                self._hnsw.load(str(graph_path))
+            except (OSError, RuntimeError):
+                pass
+        if len(self._hnsw) != self._size:
+            self._hnsw = self._new_hnsw(self.embeddings.shape[1])
+            self._hnsw.add(np.arange(self._size), self.embeddings)
+    
+    def _grow(self, dim: int):
+        """Double the embedding buffers (amortized O(1) appends)."""
+        capacity = max(16, 2 * len(self._buffer))
+        buffer = np.empty((capacity, dim), dtype=EMBEDDING_STORAGE_DTYPE)
+        chunk_to_doc = np.empty(capacity, dtype=np.int32)
+        if self._size:
+            buffer[:self._size] = self.embeddings
+            chunk_to_doc[:self._size] = self.chunk_to_doc
+        if self._codes is not None:
+            codes = np.empty((capacity, dim), dtype=np.int8)
+            if self._size:
+                codes[:self._size] = self.codes
+            self._codes = codes
+        self._buffer = buffer
+        self._chunk_to_doc = chunk_to_doc
+    
+    def _build_codes(self) -> np.ndarray:
+        """Quantize the stored rows one cache-sized block at a time."""
+        codes = np.empty(self._buffer.shape, dtype=np.int8)
+        if self._size:
+            block = max(1, (L2_BYTES // (codes.shape[1] * self._buffer.itemsize)) // 2)
+            for start in range(0, self._size, block):
+                end = min(start + block, self._size)  # Rows past _size are uninitialized capacity
+                codes[start:end] = _quantize(self._buffer[start:end])
+        return codes
+    
+    @staticmethod
+    def _top_indices(scores: np.ndarray, k: int) -> np.ndarray:
+        """Indices of the k highest scores, best first."""
+        if k >= len(scores):
+            return np.argsort(-scores, kind='stable')
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top], kind='stable')]
     
     def search(self, query_embedding: List[float], top_k: int = 5) -> List[Tuple[Document, float]]:
         """Search for similar documents."""
-        if not self.embeddings:
+        if self._size == 0 or top_k <= 0:
             return []
         
-        scores = []
-        for emb in self.embeddings:
-            score = self.cosine_similarity(query_embedding, emb)
-            scores.append(score)
+        query = np.array(query_embedding, dtype=np.float32)
+        query /= np.linalg.norm(query) + 1e-9
+        
+        if self._hnsw is not None:
+            # Sub-linear approximate search over the HNSW graph
+            matches = self._hnsw.search(query, min(top_k, self._size))
+            return [
+                (self.docs[self._chunk_to_doc[key]], 1.0 - float(distance))
+                for key, distance in zip(matches.keys, matches.distances)
+            ]
+        
+        top_k = min(top_k, self._size)
+        coarse = self._coarse_scores(query)
+        if coarse is not None:
+            # Coarse pass over the int8 codes, then exact float32 re-rank
+            candidates = self._top_indices(coarse, min(self._size, top_k * QUANTIZED_RERANK_FACTOR))
+            scores = self.embeddings[candidates] @ query
+            top_indices = self._top_indices(scores, top_k)
+            return [(self.docs[self._chunk_to_doc[candidates[i]]], float(scores[i])) for i in top_indices]
         
-        # Get top k indices
-        top_indices = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)[:top_k]
-        return [(self.documents[i], scores[i]) for i in top_indices]
+        # Get top k indices without sorting all N scores
+        scores = self._scan_scores(query)
+        top_indices = self._top_indices(scores, top_k)
+        return [(self.docs[self._chunk_to_doc[i]], float(scores[i])) for i in top_indices]
     
-    @staticmethod
-    def cosine_similarity(a: List[float], b: List[float]) -> float:
-        """Calculate cosine similarity between two vectors."""
-        dot = sum(x*y for x, y in zip(a, b))
-        norm_a = sum(x*x for x in a) ** 0.5
-        norm_b = sum(x*x for x in b) ** 0.5
+    def _scan_scores(self, query: np.ndarray) -> np.ndarray:
+        """Dot product of every row with query, computed one cache-sized block at a time."""
+        matrix = self.embeddings
+        scores = np.empty(self._size, dtype=np.float32)
+        if _batch_cosine is not None:
+            # Rows are unit length, so cosine is the same dot product
+            _batch_cosine(np.asarray(matrix, dtype=np.float32), query, scores)
+            return scores
         
-        if norm_a == 0 or norm_b == 0:
-            return 0
-        return dot / (norm_a * norm_b)
+        block = max(1, (L2_BYTES // (matrix.shape[1] * matrix.itemsize)) // 2)
+        for start in range(0, self._size, block):
+            rows = matrix[start:start + block].astype(np.float32, copy=False)
+            np.dot(rows, query, out=scores[start:start + block])
+        return scores
     
-    def save(self, path: Path):
-        """Save to disk."""
-        data = {
-            'documents': [asdict(d) for d in self.documents],
-            'embeddings': self.embeddings
-        }
-        with open(path, 'w') as f:
-            json.dump(data, f)
+    def _coarse_scores(self, query: np.ndarray) -> Optional[np.ndarray]:
+        """Approximate cosine scores from the int8 codes, or None without QUANTIZED_SEARCH."""
+        if not QUANTIZED_SEARCH:
+            return None
+        # SIMD kernel dispatched for the CPU (AVX2/AVX-512/NEON)
+        query_codes = _quantize(query)
+        return 1.0 - np.asarray(simsimd.cdist(query_codes[None, :], self.codes, metric="cosine"))[0]
     
-    def load(self, path: Path):
+    def save(self, directory: Path):
+        """Append documents and embedding rows added since the last save."""
+        meta = dict(self._saved)
+        if meta['dtype'] is None:
+            meta['dtype'] = np.dtype(EMBEDDING_STORAGE_DTYPE).name
+        
+        new_docs = b''.join(_dumps(asdict(d)) + b'\n' for d in self.docs[meta['documents']:])
+        meta['documents_bytes'] = _write_at(directory / "documents.jsonl", meta['documents_bytes'], new_docs)
+        
+        # Raw rows in the file's dtype, appended after the last committed row
+        row_bytes = meta['dim'] * np.dtype(meta['dtype']).itemsize
+        new_rows = np.ascontiguousarray(self.embeddings[meta['rows']:], dtype=meta['dtype'])
+        _write_at(directory / "embeddings.bin", meta['rows'] * row_bytes, new_rows.tobytes())
+        
+        # int8 codes likewise, so loading never has to re-quantize the rows
+        if QUANTIZED_SEARCH:
+            new_codes = np.ascontiguousarray(self.codes[meta['code_rows']:])
+            _write_at(directory / "codes.bin", meta['code_rows'] * meta['dim'], new_codes.tobytes())
+            meta['code_rows'] = self._size
+        
+        # meta.json last: it commits everything appended above
+        meta.update(documents=len(self.docs), rows=self._size, dim=self.embeddings.shape[1], embedder=self.embedder)
+        tmp_path = directory / "meta.json.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(_dumps(meta))
+        os.replace(tmp_path, directory / "meta.json")
+        self._saved = meta
+        
+        if self._hnsw is not None:
+            self._hnsw.save(str(directory / "index.usearch"))
+    
+    def load(self, directory: Path):
         """Load from disk."""
-        with open(path, 'r') as f:
-            data = json.load(f)
-            self.documents = [Document(**d) for d in data['documents']]
-            self.embeddings = data['embeddings']
+        with open(directory / "meta.json", 'rb') as f:
+            meta = _loads(f.read())
+        
+        # Anything past the committed sizes is from an interrupted save
+        with open(directory / "documents.jsonl", 'rb') as f:
+            lines = f.read(meta['documents_bytes']).splitlines()
+        self.docs = [Document(**_loads(line)) for line in lines]
+        
+        # Rows were normalized before saving; pages are read in on demand.
+        # Stores saved without QUANTIZED_SEARCH have no (or too few) int8 codes; they
+        # are then quantized on first use and written by the next save()
+        meta.setdefault('code_rows', 0)
+        codes = None
+        if meta['rows']:
+            matrix = np.memmap(directory / "embeddings.bin", dtype=meta['dtype'], mode='r', shape=(meta['rows'], meta['dim']))
+            if QUANTIZED_SEARCH and meta['code_rows'] == meta['rows']:
+                codes = np.memmap(directory / "codes.bin", dtype=np.int8, mode='r', shape=(meta['rows'], meta['dim']))
+        else:
+            matrix = np.empty((0, 0), dtype=meta['dtype'])
+        
+        self._set_matrix(matrix, self._chunk_map(len(matrix)), directory / "index.usearch", codes)
+        self.embedder = meta.get('embedder')
+        self._saved = meta
+    
+    def load_npy(self, directory: Path):
+        """Load the documents.json + embeddings.npy layout written by older versions."""
+        with open(directory / "documents.json", 'rb') as f:
+            self.docs = [Document(**d) for d in _loads(f.read())]
+        
+        matrix = np.load(directory / "embeddings.npy", mmap_mode='r')
+        self._set_matrix(matrix, self._chunk_map(len(matrix)), directory / "index.usearch")
+    
+    def _chunk_map(self, rows: int) -> np.ndarray:
+        """Rebuild chunk_to_doc; each document's chunks were added as consecutive rows."""
+        counts = [len(d.chunks) for d in self.docs]
+        if rows != sum(counts):
+            raise ValueError("stored embeddings do not match the stored documents")
+        return np.repeat(np.arange(len(self.docs), dtype=np.int32), counts)
+    
+    def load_legacy(self, path: Path):
+        """Load an index.json written by older versions (embeddings inline as JSON)."""
+        with open(path, 'rb') as f:
+            data = _loads(f.read())
+        
+        # Older versions stored a copy of the document for every chunk row
+        self.docs = []
+        chunk_to_doc = np.empty(len(data['documents']), dtype=np.int32)
+        for row, d in enumerate(data['documents']):
+            if not self.docs or self.docs[-1].id != d['id']:
+                self.docs.append(Document(**d))
+            chunk_to_doc[row] = len(self.docs) - 1
+        
+        matrix = np.asarray(data['embeddings'], dtype=np.float32)
+        if self.docs:
+            matrix /= np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-9
+        self._set_matrix(matrix.astype(EMBEDDING_STORAGE_DTYPE), chunk_to_doc, path.with_suffix('.usearch'))
+    
+    def _set_matrix(self, matrix: np.ndarray, chunk_to_doc: np.ndarray, graph_path: Path,
+                    codes: Optional[np.ndarray] = None):
+        """Replace the stored embeddings; the first add copies them into a growable buffer."""
+        if not len(matrix):
+            matrix = np.empty((0, 0), dtype=EMBEDDING_STORAGE_DTYPE)
+        self._buffer = matrix
+        # Without saved codes they are built from the rows when first needed
+        self._codes = codes
+        self._chunk_to_doc = chunk_to_doc
+        self._size = len(matrix)
+        # Unknown until the caller says otherwise (older layouts never recorded it)
+        self.embedder = None
+        
+        self._hnsw = None
+        if HNSWIndex is not None and self._size:
+            self._load_hnsw(graph_path)
 
 
 # ============================================================================
@@ -127,82 +530,171 @@ class VectorStore:
 class EmbeddingGenerator:
     """Generate text embeddings using OpenRouter API."""
     
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, cache_path: Optional[Path] = None):
         self.api_key = api_key or OPENROUTER_API_KEY
         self.base_url = OPENROUTER_BASE_URL
+        self.session = _new_session(self.api_key)
+        
+        # API embeddings keyed by a hash of the text sent, so re-indexed or
+        # repeated chunks are only paid for once. cache_path is the stem of the
+        # .keys/.bin/.json files; keys added since the last save are pending.
+        self.cache_path = cache_path
+        self._cache_saved = {'rows': 0, 'dim': 0}
+        self._cache_pending: List[bytes] = []
+        self.cache = self._load_cache()
+        # Batches embedded with the hash fallback after an API error
+        self.fallback_batches = 0
+    
+    @property
+    def embedder(self) -> str:
+        """What generate() embeds with: the API model, or the hash fallback without a key."""
+        if self.api_key == "API_KEY" or not self.api_key:
+            return HASH_EMBEDDER
+        return EMBEDDING_MODEL
     
     def generate(self, text: str) -> List[float]:
         """Generate embedding for text."""
+        return self.generate_many([text])[0]
+    
+    def generate_many(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings for many texts."""
         if self.api_key == "API_KEY" or not self.api_key:
             # Fallback to hash-based pseudo-embedding
-            return self._generate_hash_embedding(text)
+            return [self._generate_hash_embedding(text) for text in texts]
+        
+        texts = [text[:EMBEDDING_INPUT_CHARS] for text in texts]
+        keys = [self._cache_key(text) for text in texts]
         
+        # Only texts never embedded before go to the API, each one once
+        pending = {key: text for key, text in zip(keys, texts) if key not in self.cache}
+        fresh = dict(zip(pending, self._generate_uncached(list(pending.values())))) if pending else {}
+        return [fresh[key] if key in fresh else self.cache[key] for key in keys]
+    
+    def _generate_uncached(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts through the API in request-sized batches."""
+        return [embedding for batch in self._sub_batches(texts) for embedding in self._generate_batch(batch)]
+    
+    def _generate_batch(self, batch: List[str]) -> List[List[float]]:
+        """Embed one request-sized batch, falling back to hash embeddings on error."""
         try:
-            return self._generate_api_embedding(text)
+            embeddings = self._generate_api_embeddings(batch)
         except Exception as e:
             print(f"⚠️ API error, using fallback: {e}")
-            return self._generate_hash_embedding(text)
-    
-    def _generate_api_embedding(self, text: str) -> List[float]:
-        """Generate embedding using OpenRouter API."""
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-            "HTTP-Referer": "https://github.com/vacationtube2024-droid/alita-repo-001",
-            "X-Title": "Alita Knowledge Base"
-        }
+            self.fallback_batches += 1
+            return [self._generate_hash_embedding(text) for text in batch]
         
+        # Fallback embeddings are not cached, so they are retried next time
+        for text, embedding in zip(batch, embeddings):
+            key = self._cache_key(text)
+            if key not in self.cache:
+                self._cache_pending.append(key)
+            self.cache[key] = np.asarray(embedding, dtype=np.float32)
+        return embeddings
+    
+    @staticmethod
+    def _sub_batches(texts: List[str]) -> Iterator[List[str]]:
+        """Split texts into request-sized batches (by count and by total length)."""
+        batch, batch_chars = [], 0
+        for text in texts:
+            if batch and (len(batch) == EMBEDDING_BATCH_SIZE or batch_chars + len(text) > EMBEDDING_BATCH_CHARS):
+                yield batch
+                batch, batch_chars = [], 0
+            batch.append(text)
+            batch_chars += len(text)
+        if batch:
+            yield batch
+    
+    @staticmethod
+    def _cache_key(text: str) -> bytes:
+        """Content hash identifying an embedding input."""
+        return hashlib.blake2b(text.encode(), digest_size=CACHE_KEY_BYTES).digest()
+    
+    def _load_cache(self) -> Dict[bytes, np.ndarray]:
+        """Map the persisted embedding cache (rows are memory-mapped), or start empty."""
+        if self.cache_path is None:
+            return {}
+        try:
+            with open(self.cache_path.with_suffix(".json"), 'rb') as f:
+                meta = _loads(f.read())
+            if not meta['rows']:
+                return {}
+            with open(self.cache_path.with_suffix(".keys"), 'rb') as f:
+                keys = f.read(meta['rows'] * CACHE_KEY_BYTES)
+            rows = np.memmap(self.cache_path.with_suffix(".bin"), dtype=np.float32, mode='r', shape=(meta['rows'], meta['dim']))
+        except (OSError, ValueError, KeyError):
+            return {}
+        if len(keys) != meta['rows'] * CACHE_KEY_BYTES:
+            return {}
+        
+        self._cache_saved = meta
+        return {keys[i * CACHE_KEY_BYTES:(i + 1) * CACHE_KEY_BYTES]: rows[i] for i in range(meta['rows'])}
+    
+    def save_cache(self):
+        """Append cache entries added since the last save."""
+        if self.cache_path is None or not self._cache_pending:
+            return
+        meta = dict(self._cache_saved)
+        dim = meta['dim'] or len(self.cache[self._cache_pending[0]])
+        # Rows of another dimension (a different model) are only kept in memory
+        keys = [key for key in self._cache_pending if len(self.cache[key]) == dim]
+        self._cache_pending = []
+        if not keys:
+            return
+        rows = np.vstack([self.cache[key] for key in keys])
+        
+        # Keys and raw float32 rows are appended after the last committed entry
+        row_bytes = dim * np.dtype(np.float32).itemsize
+        _write_at(self.cache_path.with_suffix(".keys"), meta['rows'] * CACHE_KEY_BYTES, b''.join(keys))
+        _write_at(self.cache_path.with_suffix(".bin"), meta['rows'] * row_bytes, rows.tobytes())
+        
+        meta.update(rows=meta['rows'] + len(keys), dim=dim)
+        tmp_path = self.cache_path.with_suffix(".json.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(_dumps(meta))
+        os.replace(tmp_path, self.cache_path.with_suffix(".json"))
+        self._cache_saved = meta
+    
+    def _generate_api_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings for a batch of texts in one OpenRouter API call."""
         payload = {
-            "model": "openai/text-embedding-3-small",
-            "input": text[:8000]  # Limit input length
+            "model": EMBEDDING_MODEL,
+            "input": texts
         }
         
-        response = requests.post(
+        response = self.session.post(
             f"{self.base_url}/embeddings",
-            headers=headers,
             json=payload,
             timeout=30
         )
         
         if response.status_code == 200:
-            return response.json()['data'][0]['embedding']
+            return [d['embedding'] for d in response.json()['data']]
         else:
             raise Exception(f"API error: {response.status_code}")
     
-    def _generate_hash_embedding(self, text: str) -> List[float]:
+    def _generate_hash_embedding(self, text: str) -> np.ndarray:
         """Generate pseudo-embedding using multiple hash functions (improved fallback)."""
         text = text.lower()
         
         # Use both single words and bigrams for better context
         words = text.split()
-        bigrams = [f"{words[i]}_{words[i+1]}" for i in range(len(words)-1)]
+        bigrams = [f"{a}_{b}" for a, b in zip(words, words[1:])]
         
         # Combine words and bigrams
         all_tokens = words + bigrams
         
-        # Use multiple hash functions for better distribution
-        embedding = [0.0] * EMBEDDING_DIM
-        
-        for i, token in enumerate(all_tokens):
-            # Multiple hash functions for different distribution
-            hash1 = int(hashlib.md5(token.encode()).hexdigest(), 16) % EMBEDDING_DIM
-            hash2 = int(hashlib.sha256(token.encode()).hexdigest(), 16) % EMBEDDING_DIM
-            hash3 = int(hashlib.sha1(token.encode()).hexdigest(), 16) % EMBEDDING_DIM
-            
-            # Weight by position (earlier words more important)
-            position_weight = 1.0 / (1.0 + i * 0.1)
-            
-            # Add to embedding with different weights
-            embedding[hash1] += position_weight * 3.0
-            embedding[hash2] += position_weight * 2.0
-            embedding[hash3] += position_weight * 1.0
+        # Three independent buckets per token for better distribution
+        buckets = np.fromiter(
+            chain.from_iterable(map(_token_buckets, all_tokens)), dtype=np.int64, count=3 * len(all_tokens)
+        )
         
-        # Normalize
-        magnitude = sum(x*x for x in embedding) ** 0.5
-        if magnitude > 0:
-            embedding = [x/magnitude for x in embedding]
+        # Weight by position (earlier words more important), and each bucket differently
+        position_weights = 1.0 / (1.0 + np.arange(len(all_tokens)) * 0.1)
+        weights = position_weights[:, None] * HASH_BUCKET_WEIGHTS
         
-        return embedding
+        # Scatter-add every (bucket, weight) pair in one pass.
+        # Left unnormalized: VectorStore normalizes once on insert and per query
+        return np.bincount(buckets, weights=weights.ravel(), minlength=EMBEDDING_DIM).astype(np.float32)
 
 
 # ============================================================================
@@ -216,6 +708,7 @@ class RAGEngine:
         self.api_key = api_key or OPENROUTER_API_KEY
         self.base_url = OPENROUTER_BASE_URL
         self.model = DEFAULT_MODEL
+        self.session = _new_session(self.api_key)
     
     def answer(self, query: str, context_docs: List[Tuple[Document, float]]) -> str:
         """Answer query using retrieved context."""
@@ -243,13 +736,6 @@ class RAGEngine:
         """Generate answer using LLM."""
         context = self._prepare_context(context_docs)
         
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-            "HTTP-Referer": "https://github.com/vacationtube2024-droid/alita-repo-001",
-            "X-Title": "Alita Knowledge Base"
-        }
-        
         prompt = f"""You are a helpful AI assistant answering questions based on a knowledge base.
 
 Context from knowledge base:
@@ -273,9 +759,8 @@ Instructions:
             "temperature": 0.7
         }
         
-        response = requests.post(
+        response = self.session.post(
             f"{self.base_url}/chat/completions",
-            headers=headers,
             json=payload,
             timeout=60
         )
@@ -309,7 +794,7 @@ Instructions:
                 relevant_lines.append((line, len(overlap)))
         
         # Sort by relevance
-        relevant_lines.sort(key=lambda x: x[1], reverse=True)
+        relevant_lines.sort(key=itemgetter(1), reverse=True)
         
         answer = f"📚 Found in: {best_doc.source} (relevance: {score:.2f})\n\n"
         
@@ -347,25 +832,93 @@ class KnowledgeBase:
         self.storage_path.mkdir(parents=True, exist_ok=True)
         
         self.vector_store = VectorStore()
-        self.embedding_generator = EmbeddingGenerator()
+        self.embedding_generator = EmbeddingGenerator(cache_path=self.storage_path / "emb_cache")
+        self.vector_store.embedder = self.embedding_generator.embedder
         self.rag_engine = RAGEngine()
         
         self._load()
     
     def _load(self):
         """Load from disk if available."""
-        index_file = self.storage_path / "index.json"
-        if index_file.exists():
-            try:
-                self.vector_store.load(index_file)
-                print(f"📂 Loaded {len(self.vector_store.documents)} documents from storage")
-            except:
-                pass
+        legacy_file = self.storage_path / "index.json"
+        try:
+            if (self.storage_path / "meta.json").exists():
+                self.vector_store.load(self.storage_path)
+            elif (self.storage_path / "documents.json").exists():
+                self.vector_store.load_npy(self.storage_path)
+            elif legacy_file.exists():
+                self.vector_store.load_legacy(legacy_file)
+            else:
+                return
+            print(f"📂 Loaded {len(self.vector_store.docs)} documents from storage")
+        except:
+            pass
+        
+        # Reading must not rewrite the store; the next index_document() re-embeds it
+        if self._stale():
+            print(f"⚠️ Stored embeddings were made by {self.vector_store.embedder or 'an older version'}, "
+                  f"not {self.embedding_generator.embedder}; search results suffer until the next index")
+    
+    def _stale(self) -> bool:
+        """Whether the stored rows came from another embedder than queries use now."""
+        return self.vector_store.num_chunks > 0 and self.vector_store.embedder != self.embedding_generator.embedder
     
     def _save(self):
         """Save to disk."""
-        index_file = self.storage_path / "index.json"
-        self.vector_store.save(index_file)
+        self.vector_store.save(self.storage_path)
+        self.embedding_generator.save_cache()
+    
+    def _reembed(self) -> bool:
+        """Embed every stored chunk with the current embedder and swap in the new store."""
+        print(f"🔄 Re-embedding {self.vector_store.num_chunks} stored chunks with {self.embedding_generator.embedder}")
+        store = VectorStore()
+        store.embedder = self.embedding_generator.embedder
+        fallback_batches = self.embedding_generator.fallback_batches
+        for doc in self.vector_store.docs:
+            doc_idx = store.add_document(doc)
+            windows = (doc.chunks[start:start + INDEX_WINDOW_CHUNKS] for start in range(0, len(doc.chunks), INDEX_WINDOW_CHUNKS))
+            for _, embeddings in self._embed_windows(windows):
+                for embedding in embeddings:
+                    store.add(doc_idx, embedding)
+        # Rows mixing API and hash embeddings would carry the wrong label
+        if self.embedding_generator.fallback_batches != fallback_batches:
+            print("⚠️ Re-embedding stopped after API errors; the store is unchanged")
+            return False
+        
+        # Written aside first, so an interruption leaves the old files intact;
+        # meta.json is moved last. Files the new store lacks (codes.bin without
+        # the quantized search, index.usearch without usearch) are stale
+        tmp_dir = self.storage_path / "reembed.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir()
+        store.save(tmp_dir)
+        for name in ("documents.jsonl", "embeddings.bin", "codes.bin", "index.usearch", "meta.json"):
+            if (tmp_dir / name).exists():
+                os.replace(tmp_dir / name, self.storage_path / name)
+            else:
+                (self.storage_path / name).unlink(missing_ok=True)
+        tmp_dir.rmdir()
+        
+        self.vector_store = store
+        self.embedding_generator.save_cache()
+        return True
+    
+    def _embed_windows(self, windows: Iterator[List[str]]) -> Iterator[Tuple[List[str], List[List[float]]]]:
+        """Embed windows of chunks with up to MAX_CONCURRENT_REQUESTS in flight, yielding them in order."""
+        pool = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS)
+        in_flight = deque()
+        try:
+            for window in windows:
+                in_flight.append((window, pool.submit(self.embedding_generator.generate_many, window)))
+                if len(in_flight) == MAX_CONCURRENT_REQUESTS:
+                    window, future = in_flight.popleft()
+                    yield window, future.result()
+            while in_flight:
+                window, future = in_flight.popleft()
+                yield window, future.result()
+        finally:
+            # Stopped early (error or Ctrl-C): drop the windows not sent yet
+            pool.shutdown(cancel_futures=True)
     
     def index_document(self, file_path: str, content: str = None, metadata: Dict = None) -> str:
         """Add a document to the knowledge base."""
@@ -374,20 +927,32 @@ class KnowledgeBase:
             with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
                 content = f.read()
         
-        doc_id = f"doc_{len(self.vector_store.documents)}"
+        # New rows must not be mixed with rows from another embedder
+        if self._stale() and not self._reembed():
+            raise RuntimeError("stored embeddings could not be re-embedded; nothing was indexed")
+        
+        # The chunk count only grows, so ids stay unique and match older versions
+        doc_id = f"doc_{self.vector_store.num_chunks}"
         doc = Document(
             id=doc_id,
             content=content,
             source=file_path,
-            metadata=metadata or {}
+            metadata=metadata or {},
+            chunks=[]
         )
         
-        # Generate embeddings for each chunk
-        for chunk in doc.chunks:
-            embedding = self.embedding_generator.generate(chunk)
-            self.vector_store.add(doc, embedding)
-        
-        self._save()
+        # Chunk, embed and store a window at a time so only the windows in
+        # flight are held in memory; doc.chunks always matches the stored rows
+        doc_idx = self.vector_store.add_document(doc)
+        chunks = doc.chunks_iter()
+        windows = iter(lambda: list(islice(chunks, INDEX_WINDOW_CHUNKS)), [])
+        try:
+            for window, embeddings in self._embed_windows(windows):
+                for embedding in embeddings:
+                    self.vector_store.add(doc_idx, embedding)
+                doc.chunks.extend(window)
+        finally:
+            self._save()
         return doc_id
     
     def search(self, query: str, top_k: int = 5) -> List[Tuple[Document, float]]:
@@ -403,9 +968,9 @@ class KnowledgeBase:
     def get_stats(self) -> Dict:
         """Get knowledge base statistics."""
         return {
-            'total_documents': len(self.vector_store.documents),
-            'total_chunks': sum(len(d.chunks) for d in self.vector_store.documents),
-            'sources': list(set(d.source for d in self.vector_store.documents))
+            'total_documents': len(self.vector_store.docs),
+            'total_chunks': self.vector_store.num_chunks,
+            'sources': list(set(d.source for d in self.vector_store.docs))
         }
 
 